@@ -17,6 +17,24 @@ STATE_PATH = "state.json"
 SEEN_DAYS_PROJECT = int(os.getenv("SEEN_DAYS_PROJECT", "7"))
 SEEN_DAYS_TEXT = int(os.getenv("SEEN_DAYS_TEXT", "2"))
 
+# X media: upload sonrası ~24 saat geçerli
+MEDIA_TTL_FALLBACK_S = 24 * 3600
+MEDIA_EXPIRY_MARGIN_S = 300
+
+# Replies: günde 1, sadece büyük hesaplar
+REPLY_ENABLED = os.getenv("REPLY_ENABLED", "0") == "1"
+REPLY_TARGETS = [t.strip().lstrip("@") for t in os.getenv("REPLY_TARGETS", "").split(",") if t.strip()]
+REPLY_MIN_FOLLOWERS = int(os.getenv("REPLY_MIN_FOLLOWERS", "50000"))
+REPLY_AUTHOR_TTL_DAYS = int(os.getenv("REPLY_AUTHOR_TTL_DAYS", "7"))
+REPLY_POLL_MAX = int(os.getenv("REPLY_POLL_MAX", "50"))
+
+# Thread: haftalık deep dive (weekday: 0=Pzt ... 6=Paz)
+THREAD_WEEKDAY = int(os.getenv("THREAD_WEEKDAY", "6"))
+THREAD_FORCE = os.getenv("THREAD_FORCE", "0") == "1"
+THREAD_SEGMENTS = max(4, int(os.getenv("THREAD_SEGMENTS", "5")))  # hook + gövde + risk + kapanış
+THREAD_WORKERS = int(os.getenv("THREAD_WORKERS", "4"))
+THREAD_MAX_ATTEMPTS = int(os.getenv("THREAD_MAX_ATTEMPTS", "4"))
+
 # ========= Sources =========
 COINGECKO_NEW_API = "https://api.coingecko.com/api/v3/coins/list/new"
 COINGECKO_NEW_WEB = "https://www.coingecko.com/en/new-cryptocurrencies"
@@ -27,6 +45,8 @@ COINGECKO_CATEGORIES = "https://api.coingecko.com/api/v3/coins/categories"
 
 CRYPTORANK_UPCOMING = "https://cryptorank.io/upcoming-ico"
 
+DEFILLAMA_PROTOCOLS = "https://api.llama.fi/protocols"
+
 # ========= AI (GitHub Models) =========
 ai = OpenAI(
     base_url="https://models.github.ai/inference",
@@ -61,7 +81,15 @@ def load_state() -> Dict[str, Any]:
         with open(STATE_PATH, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
-        return {"seen_projects": {}, "seen_text_hashes": {}, "last_reply_date": ""}
+        return {
+            "seen_projects": {},
+            "seen_text_hashes": {},
+            "last_reply_date": "",
+            "uploaded_media": {},
+            "source_cache": {},
+            "source_health": {},
+            "reply": {"me_id": "", "cursors": {}, "authors": {}},
+        }
 
 
 def save_state(state: Dict[str, Any]) -> None:
@@ -85,6 +113,14 @@ def hash_text(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
 
 
+def hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()[:32]
+
+
 def remember_text(text: str, state: Dict[str, Any]) -> None:
     h = hash_text(text)
     state["seen_text_hashes"][h] = iso_today()
@@ -146,40 +182,221 @@ def pick_section_for_this_run() -> str:
     return sections[h % len(sections)]
 
 
-# ----------------- CoinGecko API helpers -----------------
-def _cg_get_json(url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
-    try:
-        r = requests.get(url, headers=HEADERS, params=params or {}, timeout=20)
+# ----------------- Source registry -----------------
+# Her kaynak: endpoint + TTL + timeout + parser. Bağımsız kaynaklar daemon
+# thread'lerde paralel çalışır, her biri kendi deadline'ı ile; yedek kaynaklar sadece
+# gerektiğinde çalışır. Sürekli hata veren kaynak circuit breaker ile bir süre
+# atlanır. Böylece yeni kaynak eklemek en kötü çalışma süresini uzatmaz.
+SOURCES: Dict[str, Dict[str, Any]] = {}
+
+BREAKER_FAILS = int(os.getenv("BREAKER_FAILS", "3"))
+BREAKER_COOLDOWN_S = int(os.getenv("BREAKER_COOLDOWN_S", str(6 * 3600)))
+
+
+def register_source(
+    name: str,
+    endpoint: str,
+    parser,
+    ttl_s: int = 0,
+    timeout_s: float = 10,
+    kind: str = "json",
+    params: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    parser(payload, ctx) -> List[Dict[str, str]]
+    kind: "json" | "html"
+    """
+    SOURCES[name] = {
+        "name": name,
+        "endpoint": endpoint,
+        "parser": parser,
+        "ttl_s": ttl_s,
+        "timeout_s": timeout_s,
+        "kind": kind,
+        "params": params or {},
+    }
+
+
+def _submit_daemon(fn, *args):
+    """
+    Fetch'i daemon thread'de çalıştırır. ThreadPoolExecutor worker'ları çıkışta join
+    edilir; deadline'ı aşıp bırakılan bir istek process'in kapanmasını geciktirmesin.
+    """
+    import threading
+    from concurrent.futures import Future
+
+    fut: Future = Future()
+
+    def run():
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(fn(*args))
+        except BaseException as e:
+            fut.set_exception(e)
+
+    threading.Thread(target=run, name="src", daemon=True).start()
+    return fut
+
+
+def _source_key(src: Dict[str, Any], params: Dict[str, Any]) -> str:
+    if not params:
+        return src["name"]
+    return src["name"] + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+
+
+def _fetch_source(src: Dict[str, Any], params: Dict[str, Any], ctx: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    requests timeout'u her socket okuması içindir; yavaş akan bir cevap için toplam
+    süre ayrıca kontrol edilir (stream + monotonic deadline).
+    """
+    import time
+
+    # Hata yutulmaz: breaker sayabilsin diye exception yukarı çıkar
+    deadline = time.monotonic() + float(src["timeout_s"])
+    with requests.get(
+        src["endpoint"], headers=HEADERS, params=params, timeout=src["timeout_s"], allow_redirects=True, stream=True
+    ) as r:
         if r.status_code >= 400:
-            return None
-        return r.json()
-    except Exception:
-        return None
+            raise RuntimeError(f"HTTP {r.status_code}")
+        buf = bytearray()
+        for chunk in r.iter_content(chunk_size=4096):
+            buf += chunk
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"deadline {src['timeout_s']}s exceeded")
+        encoding = r.encoding or "utf-8"
+
+    if src["kind"] == "json":
+        payload = json.loads(bytes(buf))
+    else:
+        payload = bytes(buf).decode(encoding, errors="replace")[:120000]
+    return src["parser"](payload, ctx)
 
 
-# ----------------- Sources -----------------
-def coingecko_new_projects() -> List[Dict[str, str]]:
-    # API dene
-    try:
-        r = requests.get(COINGECKO_NEW_API, headers=HEADERS, timeout=20)
-        if r.status_code == 200:
-            data = r.json()
-            out: List[Dict[str, str]] = []
-            for it in data[:120]:
-                cid = it.get("id")
-                name = (it.get("name") or "").strip()
-                symbol = (it.get("symbol") or "").upper()
-                url = f"https://www.coingecko.com/en/coins/{cid}" if cid else COINGECKO_NEW_WEB
-                if name and url:
-                    out.append({"name": name, "symbol": symbol, "url": url})
-            return out
-    except Exception:
-        pass
+def _breaker_open(health: Dict[str, Any], now: int) -> bool:
+    return health.get("fails", 0) >= BREAKER_FAILS and now < health.get("open_until", 0)
 
-    # Web fallback
-    html = fetch_text(COINGECKO_NEW_WEB)
-    if not html:
-        return []
+
+def _record_result(state: Dict[str, Any], name: str, ok: bool, now: int) -> None:
+    health = state.setdefault("source_health", {}).setdefault(name, {"fails": 0, "open_until": 0})
+    if ok:
+        health["fails"] = 0
+        health["open_until"] = 0
+        return
+    health["fails"] = health.get("fails", 0) + 1
+    if health["fails"] >= BREAKER_FAILS:
+        # half-open denemesi de başarısızsa tekrar tam cooldown
+        health["open_until"] = now + BREAKER_COOLDOWN_S
+        print(f"SOURCE_BREAKER: open {name} fails={health['fails']}", flush=True)
+
+
+def run_sources(
+    chains: List[List[str]],
+    state: Dict[str, Any],
+    params: Optional[Dict[str, Any]] = None,
+    ctx: Optional[Dict[str, Any]] = None,
+) -> List[List[Dict[str, str]]]:
+    """
+    chains: her zincir öncelik sırasıyla kaynaklar. Zincirler paralel çalışır; bir
+    zincirdeki yedek kaynak sadece öncekisi hata verirse, deadline'ı aşarsa ya da boş
+    dönerse başlatılır. Her zincir için ilk boş olmayan sonuç döner (yoksa []).
+    Bekleme süresi kaynak başına timeout ile sınırlıdır; açık breaker'lı kaynaklar atlanır.
+    """
+    import time
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    params = params or {}
+    ctx = ctx or {}
+    now = int(time.time())
+    cache = state.setdefault("source_cache", {})
+    health = state.setdefault("source_health", {})
+
+    results: List[List[Dict[str, str]]] = [[] for _ in chains]
+    positions = [0] * len(chains)
+    futures: Dict[Any, Tuple[int, str, str, float]] = {}
+
+    def start_next(ci: int) -> None:
+        chain = chains[ci]
+        while positions[ci] < len(chain):
+            name = chain[positions[ci]]
+            positions[ci] += 1
+            src = SOURCES[name]
+            p = {**src["params"], **params}
+            key = _source_key(src, p)
+
+            hit = cache.get(key)
+            if hit and src["ttl_s"] and now - int(hit.get("at", 0)) < src["ttl_s"] and hit.get("items"):
+                log("SOURCE_CACHE: hit", key)
+                results[ci] = hit["items"]
+                return
+
+            if _breaker_open(health.get(name, {}), now):
+                log("SOURCE_BREAKER: skip", name)
+                continue
+
+            fut = _submit_daemon(_fetch_source, src, p, ctx)
+            futures[fut] = (ci, name, key, time.monotonic() + float(src["timeout_s"]) + 1)
+            return
+
+    for ci in range(len(chains)):
+        start_next(ci)
+
+    while futures:
+        next_deadline = min(d for _, _, _, d in futures.values())
+        done, _ = wait(futures, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        t = time.monotonic()
+
+        for fut in [f for f, v in futures.items() if f in done or t >= v[3]]:
+            ci, name, key, _ = futures.pop(fut)
+            items: List[Dict[str, str]] = []
+            if fut not in done:
+                fut.cancel()
+                print(f"SOURCE_TIMEOUT: {name}", flush=True)
+                _record_result(state, name, False, now)
+            else:
+                try:
+                    items = fut.result() or []
+                    _record_result(state, name, True, now)
+                except Exception as e:
+                    print(f"SOURCE_ERROR: {name} {e!r}", flush=True)
+                    _record_result(state, name, False, now)
+
+            if items:
+                results[ci] = items
+                if SOURCES[name]["ttl_s"]:
+                    cache[key] = {"at": now, "items": items}
+            else:
+                start_next(ci)
+
+    # süresi geçmiş cache kayıtlarını temizle
+    for key in list(cache.keys()):
+        src = SOURCES.get(key.split("?", 1)[0])
+        if not src or now - int(cache[key].get("at", 0)) >= src["ttl_s"]:
+            cache.pop(key, None)
+
+    # cache'teki dict'ler çağıranın değişikliklerinden (ör. normalize_url) etkilenmesin
+    return [[dict(it) for it in items] for items in results]
+
+
+def _coin_item(cid: Optional[str], name: Optional[str], symbol: Optional[str]) -> Optional[Dict[str, str]]:
+    name = (name or "").strip()
+    url = f"https://www.coingecko.com/en/coins/{cid}" if cid else ""
+    if name and url:
+        return {"name": name, "symbol": (symbol or "").upper(), "url": url}
+    return None
+
+
+# ----------------- Sources (parsers) -----------------
+def parse_coingecko_new_api(data: Any, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
+    out: List[Dict[str, str]] = []
+    for it in (data or [])[:120]:
+        item = _coin_item(it.get("id"), it.get("name"), it.get("symbol"))
+        if item:
+            out.append(item)
+    return out
+
+
+def parse_coingecko_new_web(html: str, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
     soup = BeautifulSoup(html, "lxml")
     out, seen = [], set()
     for a in soup.find_all("a", href=True):
@@ -195,40 +412,22 @@ def coingecko_new_projects() -> List[Dict[str, str]]:
     return out[:60]
 
 
-def coingecko_trending_projects() -> List[Dict[str, str]]:
-    data = _cg_get_json(COINGECKO_TRENDING)
+def parse_coingecko_trending(data: Any, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
     if not data or "coins" not in data:
         return []
     out: List[Dict[str, str]] = []
-    for item in data.get("coins", [])[:20]:
-        c = item.get("item") or {}
-        cid = c.get("id")
-        name = (c.get("name") or "").strip()
-        symbol = (c.get("symbol") or "").upper()
-        url = f"https://www.coingecko.com/en/coins/{cid}" if cid else ""
-        if name and url:
-            out.append({"name": name, "symbol": symbol, "url": url})
+    for entry in data.get("coins", [])[:20]:
+        c = entry.get("item") or {}
+        item = _coin_item(c.get("id"), c.get("name"), c.get("symbol"))
+        if item:
+            out.append(item)
     return out
 
 
-def coingecko_top_movers_projects(direction: str = "gainers") -> List[Dict[str, str]]:
+def parse_coingecko_markets(data: Any, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
     """
-    direction: "gainers" | "losers"
+    Ham market listesi; "_pct" alanı movers sıralaması için korunur.
     """
-    data = _cg_get_json(
-        COINGECKO_MARKETS,
-        params={
-            "vs_currency": "usd",
-            "order": "market_cap_desc",
-            "per_page": 250,
-            "page": 1,
-            "sparkline": "false",
-            "price_change_percentage": "24h",
-        },
-    )
-    if not data:
-        return []
-
     def pct(x):
         try:
             return float(x) if x is not None else -999999.0
@@ -236,73 +435,26 @@ def coingecko_top_movers_projects(direction: str = "gainers") -> List[Dict[str,
             return -999999.0
 
     key = "price_change_percentage_24h_in_currency"
-    items = []
-    for it in data:
-        cid = it.get("id")
-        name = (it.get("name") or "").strip()
-        symbol = (it.get("symbol") or "").upper()
-        url = f"https://www.coingecko.com/en/coins/{cid}" if cid else ""
-        if name and url:
-            items.append({"name": name, "symbol": symbol, "url": url, "_pct": pct(it.get(key))})
-
-    if not items:
-        return []
-
-    items.sort(key=lambda x: x["_pct"], reverse=(direction == "gainers"))
-    top = items[:40]
-    for it in top:
-        it.pop("_pct", None)
-    return top
-
-
-def coingecko_random_narrative_projects() -> Tuple[List[Dict[str, str]], Optional[str]]:
-    cats = _cg_get_json(COINGECKO_CATEGORIES_LIST)
-    cat_id = None
-    cat_name = None
-
-    if isinstance(cats, list) and cats:
-        c = random.choice(cats)
-        cat_id = c.get("category_id")
-        cat_name = c.get("name") or "Narrative"
-    else:
-        cats2 = _cg_get_json(COINGECKO_CATEGORIES)
-        if isinstance(cats2, list) and cats2:
-            c = random.choice(cats2)
-            cat_id = c.get("id")
-            cat_name = c.get("name") or "Narrative"
-
-    if not cat_id:
-        return [], None
+    out = []
+    for it in data or []:
+        item = _coin_item(it.get("id"), it.get("name"), it.get("symbol"))
+        if item:
+            item["_pct"] = pct(it.get(key))
+            out.append(item)
+    return out
 
-    data = _cg_get_json(
-        COINGECKO_MARKETS,
-        params={
-            "vs_currency": "usd",
-            "category": cat_id,
-            "order": "volume_desc",
-            "per_page": 60,
-            "page": 1,
-            "sparkline": "false",
-        },
-    )
-    if not data:
-        return [], cat_name
 
-    out: List[Dict[str, str]] = []
-    for it in data[:50]:
-        cid = it.get("id")
-        name = (it.get("name") or "").strip()
-        symbol = (it.get("symbol") or "").upper()
-        url = f"https://www.coingecko.com/en/coins/{cid}" if cid else ""
-        if name and url:
-            out.append({"name": name, "symbol": symbol, "url": url})
-    return out, cat_name
+def parse_coingecko_categories(data: Any, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
+    # /categories/list -> category_id, /categories -> id
+    out = []
+    for c in data if isinstance(data, list) else []:
+        cid = c.get("category_id") or c.get("id")
+        if cid:
+            out.append({"id": cid, "name": c.get("name") or "Narrative"})
+    return out
 
 
-def cryptorank_upcoming_projects() -> List[Dict[str, str]]:
-    html = fetch_text(CRYPTORANK_UPCOMING)
-    if not html:
-        return []
+def parse_cryptorank_upcoming(html: str, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
     soup = BeautifulSoup(html, "lxml")
     out, seen = [], set()
     for a in soup.find_all("a", href=True):
@@ -319,6 +471,91 @@ def cryptorank_upcoming_projects() -> List[Dict[str, str]]:
     return out[:60]
 
 
+def parse_defillama_new(data: Any, ctx: Dict[str, Any]) -> List[Dict[str, str]]:
+    items = [p for p in (data or []) if p.get("listedAt") and p.get("name") and p.get("url")]
+    items.sort(key=lambda p: p.get("listedAt", 0), reverse=True)
+    out: List[Dict[str, str]] = []
+    for p in items[:40]:
+        symbol = (p.get("symbol") or "").upper()
+        out.append({"name": p["name"].strip(), "symbol": "" if symbol == "-" else symbol, "url": p["url"].strip()})
+    return out
+
+
+register_source("coingecko_new_api", COINGECKO_NEW_API, parse_coingecko_new_api, ttl_s=1800, timeout_s=12)
+register_source("coingecko_new_web", COINGECKO_NEW_WEB, parse_coingecko_new_web, ttl_s=1800, timeout_s=12, kind="html")
+register_source("coingecko_trending", COINGECKO_TRENDING, parse_coingecko_trending, ttl_s=600, timeout_s=10)
+register_source(
+    "coingecko_markets_top",
+    COINGECKO_MARKETS,
+    parse_coingecko_markets,
+    ttl_s=300,
+    timeout_s=12,
+    params={
+        "vs_currency": "usd",
+        "order": "market_cap_desc",
+        "per_page": 250,
+        "page": 1,
+        "sparkline": "false",
+        "price_change_percentage": "24h",
+    },
+)
+register_source(
+    "coingecko_markets_category",
+    COINGECKO_MARKETS,
+    parse_coingecko_markets,
+    ttl_s=600,
+    timeout_s=12,
+    params={"vs_currency": "usd", "order": "volume_desc", "per_page": 60, "page": 1, "sparkline": "false"},
+)
+register_source("coingecko_categories_list", COINGECKO_CATEGORIES_LIST, parse_coingecko_categories, ttl_s=24 * 3600, timeout_s=10)
+register_source("coingecko_categories", COINGECKO_CATEGORIES, parse_coingecko_categories, ttl_s=24 * 3600, timeout_s=12)
+register_source("cryptorank_upcoming", CRYPTORANK_UPCOMING, parse_cryptorank_upcoming, ttl_s=3600, timeout_s=12, kind="html")
+register_source("defillama_new", DEFILLAMA_PROTOCOLS, parse_defillama_new, ttl_s=3600, timeout_s=15)
+
+# Bölüm -> kaynak zincirleri. İç liste: öncelik sırası (yedek sadece öncekisi
+# başarısız/boşsa çalışır), dış liste: zincirler paralel çalışır, sonuçlar birleştirilir.
+SECTION_SOURCES: Dict[str, List[List[str]]] = {
+    "new": [["coingecko_new_api", "coingecko_new_web"], ["defillama_new"]],
+    "trending": [["coingecko_trending"]],
+    "movers": [["coingecko_markets_top"]],
+    "upcoming": [["cryptorank_upcoming"]],
+}
+
+
+def _merge_results(results: List[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    out, seen = [], set()
+    for items in results:
+        for it in items:
+            if it["url"] not in seen:
+                seen.add(it["url"])
+                out.append(it)
+    return out
+
+
+def movers_from_markets(items: List[Dict[str, str]], direction: str = "gainers") -> List[Dict[str, str]]:
+    """
+    direction: "gainers" | "losers"
+    """
+    items = [dict(it) for it in items]
+    items.sort(key=lambda x: x.get("_pct", -999999.0), reverse=(direction == "gainers"))
+    top = items[:40]
+    for it in top:
+        it.pop("_pct", None)
+    return top
+
+
+def random_narrative_projects(state: Dict[str, Any]) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    cats = run_sources([["coingecko_categories_list", "coingecko_categories"]], state)[0]
+    if not cats:
+        return [], None
+
+    c = random.choice(cats)
+    cat_name = c.get("name") or "Narrative"
+    items = run_sources([["coingecko_markets_category"]], state, params={"category": c["id"]})[0]
+    out = [{k: v for k, v in it.items() if k != "_pct"} for it in items[:50]]
+    return out, cat_name
+
+
 def find_x_handle_from_page(url: str) -> Optional[str]:
     html = fetch_text(url, limit=120000)
     if not html:
@@ -485,23 +722,105 @@ def should_attach_image(prob: float = 0.7) -> bool:
 
 
 # ----------------- X Posting -----------------
-def post_tweet(text: str, image_path: Optional[str] = None) -> bool:
+def _media_cache(state: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    state["uploaded_media"]: {png_hash: {"media_id": "...", "expires_at": epoch}}
+    Süresi dolmuş kayıtları temizler.
+    """
+    import time
+
+    cache = state.setdefault("uploaded_media", {})
+    now = int(time.time())
+    for h in [h for h, v in cache.items() if int(v.get("expires_at", 0)) - MEDIA_EXPIRY_MARGIN_S <= now]:
+        cache.pop(h, None)
+    return cache
+
+
+def upload_media(image_path: str) -> Tuple[str, str, int]:
+    """
+    State'e dokunmadan upload eder: (png_hash, media_id, ttl_s). Thread içinden çağrılabilir.
+    """
+    h = hash_file(image_path)
+    media = x_api_v1.media_upload(image_path)
+    ttl = getattr(media, "expires_after_secs", None) or MEDIA_TTL_FALLBACK_S
+    log("MEDIA_CACHE: upload", h, media.media_id_string, "ttl", ttl)
+    return h, media.media_id_string, int(ttl)
+
+
+def cache_media(state: Dict[str, Any], h: str, media_id: str, ttl: int) -> None:
+    import time
+
+    _media_cache(state)[h] = {"media_id": media_id, "expires_at": int(time.time()) + int(ttl)}
+
+
+def cached_media_id(image_path: str, state: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    if state is None:
+        return None
+    h = hash_file(image_path)
+    hit = _media_cache(state).get(h)
+    if hit and hit.get("media_id"):
+        log("MEDIA_CACHE: hit", h, hit["media_id"])
+        return hit["media_id"]
+    return None
+
+
+def upload_media_cached(image_path: str, state: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Aynı içerikli PNG daha önce yüklendiyse (ve süresi dolmadıysa) media_id'yi tekrar kullanır.
+    """
+    media_id = cached_media_id(image_path, state)
+    if media_id:
+        return media_id
+
+    h, media_id, ttl = upload_media(image_path)
+    if state is not None:
+        cache_media(state, h, media_id, ttl)
+    return media_id
+
+
+def forget_media(image_path: str, state: Optional[Dict[str, Any]] = None) -> None:
+    if state is None or not image_path:
+        return
+    try:
+        state.get("uploaded_media", {}).pop(hash_file(image_path), None)
+    except Exception:
+        pass
+
+
+def post_tweet(
+    text: str,
+    image_path: Optional[str] = None,
+    state: Optional[Dict[str, Any]] = None,
+    in_reply_to_tweet_id: Optional[str] = None,
+) -> bool:
+    return send_tweet(text, image_path=image_path, state=state, in_reply_to_tweet_id=in_reply_to_tweet_id) is not None
+
+
+def send_tweet(
+    text: str,
+    image_path: Optional[str] = None,
+    state: Optional[Dict[str, Any]] = None,
+    in_reply_to_tweet_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Başarılıysa tweet id döner ("" = gönderildi ama id okunamadı), başarısızsa None.
+    """
     import time
 
     for attempt in range(2):
         try:
             if image_path:
-                media = x_api_v1.media_upload(image_path)
-                resp = x_client_v2.create_tweet(text=text, media_ids=[media.media_id_string])
+                media_id = upload_media_cached(image_path, state)
+                resp = x_client_v2.create_tweet(text=text, media_ids=[media_id], in_reply_to_tweet_id=in_reply_to_tweet_id)
             else:
-                resp = x_client_v2.create_tweet(text=text)
+                resp = x_client_v2.create_tweet(text=text, in_reply_to_tweet_id=in_reply_to_tweet_id)
 
             tid = resp.data.get("id") if resp and resp.data else None
             if tid:
                 print("TWEET_LINK:", f"https://x.com/i/web/status/{tid}", flush=True)
 
             print("Tweet sent OK", flush=True)
-            return True
+            return str(tid or "")
 
         except tweepy.errors.TooManyRequests as e:
             wait_s = 910
@@ -519,16 +838,25 @@ def post_tweet(text: str, image_path: Optional[str] = None) -> bool:
 
         except tweepy.errors.Forbidden as e:
             print("X_FORBIDDEN_403:", str(e), flush=True)
-            return False
+            return None
+
+        except tweepy.errors.BadRequest as e:
+            # media_id geçersiz/expired olabilir -> cache'ten at, tekrar denemede yeniden yüklenir
+            print("TWEET_ERROR_400:", str(e), flush=True)
+            forget_media(image_path, state)
+            if attempt == 0:
+                time.sleep(5)
+                continue
+            return None
 
         except Exception as e:
             print("TWEET_ERROR:", repr(e), flush=True)
             if attempt == 0:
                 time.sleep(5)
                 continue
-            return False
+            return None
 
-    return False
+    return None
 
 
 def tweet_with_optional_image(
@@ -537,19 +865,202 @@ def tweet_with_optional_image(
     subtitle: str,
     force_image: bool = False,
     image_prob: float = 0.7,
+    state: Optional[Dict[str, Any]] = None,
 ) -> bool:
     attach = True if force_image else should_attach_image(image_prob)
     if attach:
         img = make_project_card(title=title, subtitle=subtitle)
-        ok = post_tweet(tweet_text, image_path=img)
+        ok = post_tweet(tweet_text, image_path=img, state=state)
         print(f"MEDIA: attached=1 ok={int(ok)}", flush=True)
         return ok
     else:
-        ok = post_tweet(tweet_text)
+        ok = post_tweet(tweet_text, state=state)
         print(f"MEDIA: attached=0 ok={int(ok)}", flush=True)
         return ok
 
 
+# ----------------- Replies -----------------
+# Günde en fazla 1 reply, sadece büyük hesaplara. Mention'lar ve hedef hesaplar
+# since_id cursor'ları ile artımlı okunur; yazar bilgisi expansions ile aynı
+# çağrıda gelir ve state'te cache'lenir, eksik olanlar toplu lookup ile tamamlanır.
+def _reply_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    r = state.setdefault("reply", {})
+    r.setdefault("me_id", "")
+    r.setdefault("cursors", {})
+    r.setdefault("authors", {})
+    return r
+
+
+def _remember_authors(users: List[Any], rs: Dict[str, Any]) -> None:
+    for u in users or []:
+        metrics = getattr(u, "public_metrics", None) or {}
+        rs["authors"][str(u.id)] = {
+            "username": u.username,
+            "followers": int(metrics.get("followers_count", 0)),
+            "at": iso_today(),
+        }
+
+
+def _lookup_authors(author_ids: List[str], rs: Dict[str, Any]) -> None:
+    """
+    Eskimiş kayıtlar silinir (state büyümesin); cache'te olmayan yazarlar için
+    100'lük gruplarla tek get_users çağrısı.
+    """
+    for aid in [a for a, v in rs["authors"].items() if days_ago(v.get("at", "")) >= REPLY_AUTHOR_TTL_DAYS]:
+        rs["authors"].pop(aid, None)
+
+    missing = []
+    for aid in dict.fromkeys(author_ids):
+        cached = rs["authors"].get(aid)
+        if not cached or days_ago(cached.get("at", "")) >= REPLY_AUTHOR_TTL_DAYS:
+            missing.append(aid)
+    for i in range(0, len(missing), 100):
+        resp = x_client_v2.get_users(ids=missing[i : i + 100], user_fields=["public_metrics"], user_auth=True)
+        _remember_authors(resp.data or [], rs)
+
+
+def _poll(fetch, cursor_key: str, rs: Dict[str, Any], staged: Dict[str, str], **kwargs) -> List[Any]:
+    """
+    fetch: x_client_v2.get_users_mentions / search_recent_tweets
+    since_id varsa sadece yeni tweet'ler gelir; newest_id sadece staged'e yazılır,
+    reply kararı verildikten sonra commit_reply_cursors ile kalıcı olur.
+    İlk çalıştırmada geçmişi taramamak için küçük bir sayfa ile başlanır.
+    Okuma uçları varsayılan olarak bearer token ister; bu client OAuth1 kullanıcı
+    bağlamında çalıştığı için user_auth=True gerekir.
+    """
+
+    def call(since_id: Optional[str]):
+        return fetch(
+            since_id=since_id,
+            max_results=REPLY_POLL_MAX if since_id else 10,
+            expansions=["author_id"],
+            user_fields=["public_metrics"],
+            tweet_fields=["author_id", "conversation_id"],
+            user_auth=True,
+            **kwargs,
+        )
+
+    since_id = rs["cursors"].get(cursor_key) or None
+    try:
+        resp = call(since_id)
+    except tweepy.errors.BadRequest as e:
+        # search_recent_tweets: since_id 7 günlük pencerenin dışındaysa 400 -> cursor'u at, baştan oku
+        if not since_id:
+            raise
+        print(f"REPLY_CURSOR_RESET: {cursor_key} {e}", flush=True)
+        rs["cursors"].pop(cursor_key, None)
+        resp = call(None)
+    _remember_authors((resp.includes or {}).get("users", []), rs)
+    newest = (resp.meta or {}).get("newest_id")
+    if newest:
+        staged[cursor_key] = newest
+    return list(resp.data or [])
+
+
+def commit_reply_cursors(state: Dict[str, Any], staged: Dict[str, str]) -> None:
+    _reply_state(state)["cursors"].update(staged)
+
+
+def _targets_query(targets: List[str], limit: int = 512) -> str:
+    """
+    Sorgu limiti aşılmasın diye from: ifadeleri sığdığı kadar eklenir, kalanlar loglanır.
+    """
+    suffix = ") -is:retweet -is:reply"
+    clauses: List[str] = []
+    for i, t in enumerate(targets):
+        clause = f"from:{t}"
+        if len("(" + " OR ".join(clauses + [clause]) + suffix) > limit:
+            print(f"REPLY_TARGETS_DROPPED: {','.join(targets[i:])}", flush=True)
+            break
+        clauses.append(clause)
+    return "(" + " OR ".join(clauses) + suffix
+
+
+def poll_reply_candidates(state: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    (adaylar, staged cursor'lar) döner; cursor'lar state'e burada yazılmaz.
+    """
+    rs = _reply_state(state)
+    if not rs["me_id"]:
+        me = x_client_v2.get_me()
+        rs["me_id"] = str(me.data.id)
+
+    staged: Dict[str, str] = {}
+    tweets = _poll(x_client_v2.get_users_mentions, "mentions", rs, staged, id=rs["me_id"])
+    if REPLY_TARGETS:
+        tweets += _poll(x_client_v2.search_recent_tweets, "targets", rs, staged, query=_targets_query(REPLY_TARGETS))
+
+    tweets = [t for t in tweets if str(t.author_id) != rs["me_id"]]
+    _lookup_authors([str(t.author_id) for t in tweets], rs)
+
+    out = []
+    for t in tweets:
+        author = rs["authors"].get(str(t.author_id)) or {}
+        if author.get("followers", 0) >= REPLY_MIN_FOLLOWERS:
+            out.append({"id": str(t.id), "text": t.text, "username": author.get("username", ""), "followers": author["followers"]})
+    out.sort(key=lambda c: c["followers"], reverse=True)
+    return out, staged
+
+
+def ai_reply_text(candidate: Dict[str, Any]) -> str:
+    prompt = f"""
+You are a friendly crypto Twitter researcher.
+
+Write ONE short reply in Turkish with a warm, sympathetic tone (not cringe).
+No emojis, no hashtags, no links, no shilling.
+Add one useful, factual point or a thoughtful question. If unclear, say "net değil".
+Max 200 characters. Return only the reply text.
+
+Replying to @{candidate.get("username", "")}:
+{candidate.get("text", "")}
+"""
+
+    res = ai.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.6,
+    )
+    text = (res.choices[0].message.content or "").replace("\r", "").strip().strip('"')
+    return text[:240]
+
+
+def maybe_reply(state: Dict[str, Any]) -> None:
+    """
+    Bütçe (1/gün) API'ye gitmeden önce yerelde kontrol edilir.
+    Cursor'lar sadece aday yoksa ya da reply atıldıysa ilerler; aksi halde
+    aynı tweet'ler bir sonraki çalıştırmada tekrar değerlendirilir.
+    Hata olursa loglanıp geçilir; ana post akışı etkilenmez.
+    """
+    if not REPLY_ENABLED:
+        return
+    if state.get("last_reply_date", "") == iso_today():
+        log("REPLY: budget used today")
+        return
+
+    try:
+        candidates, staged = poll_reply_candidates(state)
+
+        if not candidates:
+            commit_reply_cursors(state, staged)
+            print("REPLY: attempted=0 reason=NO_CANDIDATES", flush=True)
+            return
+
+        c = candidates[0]
+        text = ai_reply_text(c)
+        if not text or is_duplicate_text(text, state):
+            print("REPLY: attempted=0 reason=EMPTY_OR_DUPLICATE", flush=True)
+            return
+
+        ok = post_tweet(text, state=state, in_reply_to_tweet_id=c["id"])
+        print(f"REPLY: attempted=1 posted={int(ok)} to=@{c['username']} followers={c['followers']}", flush=True)
+        if ok:
+            commit_reply_cursors(state, staged)
+            state["last_reply_date"] = iso_today()
+            remember_text(text, state)
+    except Exception as e:
+        print("REPLY_ERROR:", repr(e), flush=True)
+
+
 # ----------------- Filters -----------------
 def filter_projects(projects: List[Dict[str, str]], state: Dict[str, Any]) -> List[Dict[str, str]]:
     """
@@ -588,38 +1099,240 @@ def enforce_3_lines_and_url(tweet: str, url: str) -> str:
     return "\n".join(lines)[:240]
 
 
+# ----------------- Thread (weekly deep dive) -----------------
+# Tüm segmentler tek yapılandırılmış LLM çağrısı ile üretilir, kartlar ve media
+# upload'ları paralel hazırlanır, sonra zincir in_reply_to_tweet_id ile atılır.
+# İlerleme state["thread"] içinde her segmentten sonra kaydedilir; hata/rate limit
+# sonrası bir sonraki çalıştırma kaldığı segmentten devam eder.
+def iso_week() -> str:
+    y, w, _ = dt.datetime.utcnow().date().isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def thread_pending(state: Dict[str, Any]) -> bool:
+    th = state.get("thread") or {}
+    return bool(th.get("segments")) and not th.get("done") and th.get("attempts", 0) < THREAD_MAX_ATTEMPTS
+
+
+def should_run_thread(state: Dict[str, Any], state_restored: bool = True) -> bool:
+    """
+    Haftada 1 ve yarım kalan thread'e devam etmek state.json'ın runs arasında
+    taşınmasına bağlı. state restore edilemediyse (cache miss) yeni thread
+    başlatılmaz; aksi halde aynı hafta içinde her run yeni thread açabilirdi.
+    """
+    if thread_pending(state):
+        return True
+    if (state.get("thread") or {}).get("week") == iso_week():
+        return False
+    if not state_restored:
+        print("THREAD: skipped reason=NO_PERSISTED_STATE", flush=True)
+        return False
+    return THREAD_FORCE or dt.datetime.utcnow().weekday() == THREAD_WEEKDAY
+
+
+def ai_thread_segments(project: Dict[str, str], section_label: str, n: int) -> Tuple[List[str], List[str]]:
+    name = project.get("name", "").strip()
+    symbol = project.get("symbol", "").strip()
+    url = project.get("url", "").strip()
+    n = max(4, n)
+    body = "2" if n == 4 else f"2..{n - 2}"
+
+    prompt = f"""
+You are a friendly crypto Twitter researcher.
+
+Write a {n}-tweet deep-dive THREAD in Turkish about one project, warm and sympathetic tone (not cringe).
+No emojis, no hashtags.
+
+Structure:
+1: Hook + what the project is
+{body}: How it works, team/backers, token/usage, what to watch next (one topic per tweet)
+{n - 1}: Risks (start with "Risk:")
+{n}: Short wrap-up AND MUST end with the URL
+
+Rules:
+- Each tweet <= 240 characters.
+- Include the URL exactly once, only in the last tweet.
+- Be factual. If unclear, say "net değil" or "belirsiz".
+- For each tweet also write a short card caption (<= 70 chars).
+
+Section: {section_label}
+Project: {name}
+Symbol: {symbol}
+URL: {url}
+
+Return STRICT JSON:
+{{"tweets":["...", "..."],"captions":["...", "..."]}}
+"""
+
+    res = ai.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.6,
+    )
+
+    raw = (res.choices[0].message.content or "").strip()
+    raw = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw)  # ```json ... ``` sarmalı
+
+    try:
+        obj = json.loads(raw)
+        tweets = [(t or "").replace("\r", "").strip()[:240] for t in obj.get("tweets", [])][:n]
+        captions = [(c or "").strip()[:70] for c in obj.get("captions", [])][: len(tweets)]
+    except Exception:
+        return [], []
+
+    tweets = [t for t in tweets if t]
+    if len(tweets) < 2:
+        return [], []
+    captions += [""] * (len(tweets) - len(captions))
+
+    if url and url not in tweets[-1]:
+        tweets[-1] = (tweets[-1].replace(url, "").strip()[: 240 - len(url) - 1] + " " + url).strip()
+    return tweets, captions
+
+
+def prepare_thread_media(title: str, captions: List[str], start: int, state: Dict[str, Any]) -> List[Optional[str]]:
+    """
+    Henüz atılmamış segmentler (start..) için kartları paralel çizer ve eksik media'yı
+    paralel upload eder. Worker'lar state'e dokunmaz; cache ana thread'de yazılır ve
+    send_tweet aynı dosya için tekrar upload yapmaz. Dönen liste captions ile aynı
+    indekslidir; atılmış ya da hata olan segmentler için None (görselsiz).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    n = len(captions)
+    images: List[Optional[str]] = [None] * n
+    todo = list(range(start, n))
+
+    def render(i: int) -> str:
+        return make_project_card(title=f"{title} ({i + 1}/{n})", subtitle=captions[i], out=f"thread_{i + 1}.png")
+
+    def upload(path: str) -> Optional[Tuple[str, str, int]]:
+        try:
+            return upload_media(path)
+        except Exception as e:
+            print("THREAD_MEDIA_ERROR:", path, repr(e), flush=True)
+            return None
+
+    with ThreadPoolExecutor(max_workers=THREAD_WORKERS) as pool:
+        paths = dict(zip(todo, pool.map(render, todo)))
+        missing = [i for i in todo if not cached_media_id(paths[i], state)]
+        for i in todo:
+            if i not in missing:
+                images[i] = paths[i]
+        for i, res in zip(missing, pool.map(upload, [paths[i] for i in missing])):
+            if res:
+                cache_media(state, *res)
+                images[i] = paths[i]
+
+    return images
+
+
+def post_thread_chain(state: Dict[str, Any], images: List[Optional[str]]) -> bool:
+    th = state["thread"]
+    segments = th["segments"]
+    posted = th["posted_ids"]
+
+    for i in range(len(posted), len(segments)):
+        reply_to = posted[-1] if posted else None
+        tid = send_tweet(segments[i], image_path=images[i], state=state, in_reply_to_tweet_id=reply_to)
+        if tid is None:
+            print(f"THREAD: stopped at segment {i + 1}/{len(segments)} (resume next run)", flush=True)
+            return False
+        if not tid:
+            # gönderildi ama id yok -> zincir devam edemez, tekrar denemek çift post olur
+            print(f"THREAD: segment {i + 1} posted without id, giving up chain", flush=True)
+            th["done"] = True
+            return False
+        posted.append(tid)
+        save_state(state)
+
+    th["done"] = True
+    return True
+
+
+def run_thread(state: Dict[str, Any]) -> bool:
+    """
+    Thread başlatıldıysa / devam ettirildiyse True; hiç başlatılamadıysa False
+    (main normal tek tweet akışına devam eder).
+    """
+    th = state.get("thread") or {}
+
+    if not thread_pending(state):
+        section = pick_section_for_this_run()
+        projects, section_label = load_projects_for_section(section, state)
+        candidates = filter_projects(projects, state) or projects
+        if not candidates:
+            print("THREAD: skipped reason=NO_SOURCES", flush=True)
+            return False
+
+        project = random.choice(candidates)
+        project["url"] = normalize_url(project.get("url", ""))
+        segments, captions = ai_thread_segments(project, section_label, THREAD_SEGMENTS)
+        if not segments:
+            print("THREAD: skipped reason=AI_PARSE_FAILED", flush=True)
+            return False
+
+        th = {
+            "week": iso_week(),
+            "title": project.get("name", "Deep Dive"),
+            "project_url": project.get("url", ""),
+            "segments": segments,
+            "captions": captions,
+            "posted_ids": [],
+            "attempts": 1,
+            "done": False,
+        }
+        state["thread"] = th
+        save_state(state)
+    else:
+        th["attempts"] = th.get("attempts", 0) + 1
+        print(f"THREAD: resuming at segment {len(th['posted_ids']) + 1}/{len(th['segments'])}", flush=True)
+
+    images = prepare_thread_media(th["title"], th["captions"], len(th["posted_ids"]), state)
+    ok = post_thread_chain(state, images)
+
+    print(f"SUMMARY: attempted=1 posted={int(ok)} reason=THREAD segments={len(th['posted_ids'])}/{len(th['segments'])}", flush=True)
+    if ok:
+        remember_project(th.get("project_url", ""), state)
+        remember_text(th["segments"][0], state)
+    return True
+
+
 # ----------------- Main -----------------
-def load_projects_for_section(section: str) -> Tuple[List[Dict[str, str]], str]:
-    narrative_name = None
+def load_projects_for_section(section: str, state: Dict[str, Any]) -> Tuple[List[Dict[str, str]], str]:
+    if section == "narrative":
+        projects, narrative_name = random_narrative_projects(state)
+        return projects, f"Narrative: {narrative_name or 'Category'}"
 
-    if section == "new":
-        projects = coingecko_new_projects()
-        label = "New Listings"
-    elif section == "trending":
-        projects = coingecko_trending_projects()
+    chains = SECTION_SOURCES.get(section) or SECTION_SOURCES["new"]
+    projects = _merge_results(run_sources(chains, state))
+
+    if section == "trending":
         label = "Trending"
     elif section == "movers":
         direction = "gainers" if (dt.datetime.utcnow().day % 2 == 0) else "losers"
-        projects = coingecko_top_movers_projects(direction=direction)
+        projects = movers_from_markets(projects, direction=direction)
         label = "Top Gainers (24h)" if direction == "gainers" else "Top Losers (24h)"
-    elif section == "narrative":
-        projects, narrative_name = coingecko_random_narrative_projects()
-        label = f"Narrative: {narrative_name or 'Category'}"
     elif section == "upcoming":
-        projects = cryptorank_upcoming_projects()
         label = "Upcoming Token Sales"
     else:
-        projects = coingecko_new_projects()
         label = "New Listings"
 
     return projects, label
 
 
 def main():
+    state_restored = os.path.exists(STATE_PATH)
     state = load_state()
 
+    maybe_reply(state)
+
+    if should_run_thread(state, state_restored) and run_thread(state):
+        save_state(state)
+        return
+
     section = pick_section_for_this_run()
-    projects, section_label = load_projects_for_section(section)
+    projects, section_label = load_projects_for_section(section, state)
 
     log("SECTION:", section, "LABEL:", section_label, "PROJECTS:", len(projects))
 
@@ -636,7 +1349,7 @@ def main():
         )
         items = ["Fermah", "Netrum", "OpenMind", "TOKI Finance"]
         img = make_watchlist_card(today, items)
-        ok = post_tweet(fallback_tweet, image_path=img)
+        ok = post_tweet(fallback_tweet, image_path=img, state=state)
         print(f"SUMMARY: attempted=1 posted={int(ok)} reason=FALLBACK_WATCHLIST_NO_SOURCES section={section}", flush=True)
         if ok:
             remember_text(fallback_tweet, state)
@@ -672,6 +1385,7 @@ def main():
             subtitle=caption or section_label,
             force_image=False,
             image_prob=0.7,
+            state=state,
         )
 
         print(f"SUMMARY: attempted=1 posted={int(ok)} reason=FALLBACK_RADAR_NO_FRESH section={section}", flush=True)
@@ -711,22 +1425,24 @@ def main():
         subtitle=caption or section_label,
         force_image=False,
         image_prob=0.7,
+        state=state,
     )
 
     if not ok:
-        # 1 retry (yeni metin)
-        tweet2, caption2 = ai_research_tweet(project, section_label)
+        # 1 retry (yeni metin, aynı kart -> media_id cache'ten tekrar kullanılır)
+        tweet2, _ = ai_research_tweet(project, section_label)
         tweet2 = enforce_3_lines_and_url(tweet2, url)
 
         ok = tweet_with_optional_image(
             tweet_text=tweet2,
             title=project.get("name", "New Project"),
-            subtitle=caption2 or section_label,
+            subtitle=caption or section_label,
             force_image=False,
             image_prob=0.7,
+            state=state,
         )
         if ok:
-            tweet, caption = tweet2, caption2
+            tweet = tweet2
 
     if not ok:
         print(f"SUMMARY: attempted=1 posted=0 reason=POST_FAILED_AFTER_RETRY section={section}", flush=True)